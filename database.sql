@@ -10,11 +10,14 @@ CREATE TABLE products (
   price DECIMAL(10, 2) NOT NULL,
   description TEXT,
   features JSON,
+  search_slug VARCHAR(255) GENERATED ALWAYS AS (LOWER(REPLACE(TRIM(name), ' ', '-'))) STORED,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  INDEX idx_category (category),
+  INDEX idx_category_name (category, name),
   INDEX idx_name (name),
-  INDEX idx_price (price)
+  INDEX idx_search_slug (search_slug),
+  INDEX idx_price (price),
+  FULLTEXT INDEX ft_products (name, description, category)
 );
 
 -- User uploads table (for tracking uploaded images)
@@ -0,0 +1,29 @@
+// Runs once per server process before it starts handling requests.
+// Warms the pieces the first request would otherwise pay for: sharp's
+// native bindings and the database pool's connections.
+export async function register() {
+  if (process.env.NEXT_RUNTIME !== 'nodejs') {
+    return;
+  }
+
+  const { logger } = await import('./lib/logger');
+  const { getPool } = await import('./lib/database');
+  const { ImageProcessor } = await import('./lib/services/imageProcessor');
+
+  const startedAt = performance.now();
+
+  // Creating the pool also opens its idle minimum of connections
+  getPool();
+
+  // A cold start should not keep the server from booting; requests will
+  // simply pay the warm-up cost themselves
+  try {
+    await ImageProcessor.initialize();
+  } catch (error) {
+    logger.warn('ImageProcessor warm-up failed', { error });
+  }
+
+  logger.info('Server warm-up finished', {
+    durationMs: Math.round(performance.now() - startedAt)
+  });
+}
@@ -0,0 +1,60 @@
+interface CacheEntry<V> {
+  value: V;
+  expiresAt: number;
+}
+
+/**
+ * Small in-process LRU cache with optional per-entry TTL.
+ * Relies on Map preserving insertion order: the first key is always the
+ * least recently used one.
+ */
+export class LRUCache<K, V> {
+  private entries = new Map<K, CacheEntry<V>>();
+
+  constructor(
+    private readonly maxSize: number,
+    private readonly ttlMs: number = 0
+  ) {}
+
+  get(key: K): V | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      return undefined;
+    }
+
+    if (entry.expiresAt && entry.expiresAt <= Date.now()) {
+      this.entries.delete(key);
+      return undefined;
+    }
+
+    // Move to the most recently used position
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  set(key: K, value: V): void {
+    this.entries.delete(key);
+    this.entries.set(key, {
+      value,
+      expiresAt: this.ttlMs > 0 ? Date.now() + this.ttlMs : 0
+    });
+
+    while (this.entries.size > this.maxSize) {
+      const oldestKey = this.entries.keys().next().value;
+      this.entries.delete(oldestKey);
+    }
+  }
+
+  delete(key: K): void {
+    this.entries.delete(key);
+  }
+
+  clear(): void {
+    this.entries.clear();
+  }
+
+  get size(): number {
+    return this.entries.size;
+  }
+}
@@ -0,0 +1,45 @@
+/**
+ * Counting semaphore that bounds how many async tasks run at once.
+ * Waiting tasks are started in FIFO order as slots free up.
+ */
+export class Semaphore {
+  private active = 0;
+  private waiters: Array<() => void> = [];
+  private readonly limit: number;
+
+  constructor(limit: number) {
+    this.limit = Math.max(1, limit || 1);
+  }
+
+  async run<T>(task: () => Promise<T>): Promise<T> {
+    await this.acquire();
+    try {
+      return await task();
+    } finally {
+      this.release();
+    }
+  }
+
+  private acquire(): Promise<void> {
+    if (this.active < this.limit) {
+      this.active++;
+      return Promise.resolve();
+    }
+    return new Promise(resolve => this.waiters.push(resolve));
+  }
+
+  private release(): void {
+    // Hand the slot straight to the next waiter so the count never dips
+    // below the limit while tasks are queued
+    const next = this.waiters.shift();
+    if (next) {
+      next();
+    } else {
+      this.active--;
+    }
+  }
+
+  get pending(): number {
+    return this.waiters.length;
+  }
+}
@@ -0,0 +1,51 @@
+type LogLevel = 'debug' | 'info' | 'warn' | 'error';
+
+const LEVEL_PRIORITY: Record<LogLevel, number> = {
+  debug: 10,
+  info: 20,
+  warn: 30,
+  error: 40
+};
+
+const defaultLevel: LogLevel = process.env.NODE_ENV === 'production' ? 'info' : 'debug';
+const minimumPriority = LEVEL_PRIORITY[process.env.LOG_LEVEL as LogLevel] || LEVEL_PRIORITY[defaultLevel];
+
+function serializeError(error: any): Record<string, any> {
+  return {
+    name: error.name,
+    message: error.message,
+    code: error.code,
+    stack: error.stack
+  };
+}
+
+function write(level: LogLevel, message: string, fields?: Record<string, any>): void {
+  // Check the level before building anything so suppressed calls stay cheap
+  if (LEVEL_PRIORITY[level] < minimumPriority) {
+    return;
+  }
+
+  const entry: Record<string, any> = {
+    time: new Date().toISOString(),
+    level,
+    msg: message
+  };
+
+  if (fields) {
+    for (const [key, value] of Object.entries(fields)) {
+      entry[key] = value instanceof Error ? serializeError(value) : value;
+    }
+  }
+
+  // One JSON line per entry on stdio; rotation and shipping are left to the
+  // process manager or container runtime
+  const stream = LEVEL_PRIORITY[level] >= LEVEL_PRIORITY.warn ? process.stderr : process.stdout;
+  stream.write(JSON.stringify(entry) + '\n');
+}
+
+export const logger = {
+  debug: (message: string, fields?: Record<string, any>) => write('debug', message, fields),
+  info: (message: string, fields?: Record<string, any>) => write('info', message, fields),
+  warn: (message: string, fields?: Record<string, any>) => write('warn', message, fields),
+  error: (message: string, fields?: Record<string, any>) => write('error', message, fields)
+};
@@ -1,11 +1,59 @@
 import path from 'path';
 import fs from 'fs/promises';
 import sharp from 'sharp';
+import { createHash, randomBytes } from 'crypto';
+import { LRUCache } from '../cache';
+import { Semaphore } from '../concurrency';
+import { logger } from '../logger';
+
+const FEATURE_CACHE_SIZE = parseInt(process.env.FEATURE_CACHE_SIZE || '10000');
+const FEATURE_CACHE_TTL_MS = parseInt(process.env.FEATURE_CACHE_TTL_SECONDS || '86400') * 1000; // 24 hours
+
+// Length of every extracted (and fallback) feature vector
+export const FEATURE_VECTOR_LENGTH = 64;
+
+// Difference hash grid: (DHASH_SIZE + 1) x DHASH_SIZE greyscale thumbnail
+const DHASH_SIZE = 8;
+
+const ALLOWED_IMAGE_TYPES = new Set(['image/jpeg', 'image/jpg', 'image/png', 'image/webp', 'image/gif']);
+const MAX_FILE_SIZE = parseInt(process.env.MAX_FILE_SIZE || '10485760'); // 10MB
+const UNSAFE_FILENAME_CHARS = /[^a-zA-Z0-9]/g;
+
+// Bound outbound image fetches so a burst of URL submissions or a batch run
+// cannot flood remote hosts into rate limiting us
+const DOWNLOAD_MAX_CONCURRENCY = parseInt(process.env.IMAGE_DOWNLOAD_CONCURRENCY || '8');
+const DOWNLOAD_MAX_ATTEMPTS = 3;
+const DOWNLOAD_RETRY_BASE_MS = 250;
+const RETRYABLE_STATUS_CODES = new Set([429, 503]);
+const downloadSlots = new Semaphore(DOWNLOAD_MAX_CONCURRENCY);
+
+// Feature extraction gains nothing from full-resolution photos; every
+// pixel pass works on a copy bounded to this size on the long side
+const WORKING_IMAGE_MAX_SIZE = 1024;
+
+// Features are stored and returned as JSON; six decimals is far below what
+// changes a similarity ranking and roughly halves the serialized vector
+const FEATURE_PRECISION = 1e6;
+
+function roundFeature(value: number): number {
+  return Math.round(value * FEATURE_PRECISION) / FEATURE_PRECISION;
+}
+
+interface WorkingImage {
+  data: Buffer;
+  info: sharp.OutputInfo;
+}
 
 // Simple feature extraction without TensorFlow.js dependency
 export class ImageProcessor {
   private static isInitialized = false;
 
+  // Feature vectors keyed by image content hash, plus a URL -> hash index so
+  // repeated URL submissions skip the download as well as the extraction.
+  // Perceptual keys catch re-encoded copies whose bytes differ.
+  private static featureCache = new LRUCache<string, number[]>(FEATURE_CACHE_SIZE, FEATURE_CACHE_TTL_MS);
+  private static urlHashCache = new LRUCache<string, string>(FEATURE_CACHE_SIZE, FEATURE_CACHE_TTL_MS);
+
   /**
    * Initialize the image processing (now just a simple check)
    */
@@ -13,10 +61,9 @@ export class ImageProcessor {
     if (this.isInitialized) return;
 
     try {
-      console.log('Initializing ImageProcessor with Sharp-based feature extraction...');
+      logger.info('Initializing ImageProcessor with Sharp-based feature extraction...');
       
       // Test Sharp functionality
-      const testBuffer = Buffer.alloc(100);
       await sharp({
         create: {
           width: 10,
@@ -27,9 +74,9 @@ export class ImageProcessor {
       }).png().toBuffer();
       
       this.isInitialized = true;
-      console.log('✅ ImageProcessor initialized successfully');
+      logger.info('ImageProcessor initialized successfully');
     } catch (error) {
-      console.error('Failed to initialize ImageProcessor:', error);
+      logger.error('Failed to initialize ImageProcessor', { error });
       this.isInitialized = true; // Still allow fallback operation
     }
   }
@@ -45,15 +92,12 @@ export class ImageProcessor {
    * Validate uploaded image file
    */
   static validateImageFile(file: { mimetype: string; size: number }): void {
-    const allowedTypes = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp', 'image/gif'];
-    const maxSize = parseInt(process.env.MAX_FILE_SIZE || '10485760'); // 10MB
-
-    if (!allowedTypes.includes(file.mimetype)) {
+    if (!ALLOWED_IMAGE_TYPES.has(file.mimetype)) {
       throw new Error('Invalid file type. Only JPEG, PNG, WebP, and GIF are allowed.');
     }
 
-    if (file.size > maxSize) {
-      throw new Error(`File too large. Maximum size is ${Math.round(maxSize / 1024 / 1024)}MB`);
+    if (file.size > MAX_FILE_SIZE) {
+      throw new Error(`File too large. Maximum size is ${Math.round(MAX_FILE_SIZE / 1024 / 1024)}MB`);
     }
   }
 
@@ -61,303 +105,379 @@ export class ImageProcessor {
    * Save uploaded file to disk
    */
   static async saveUploadedFile(buffer: Buffer, originalFilename: string): Promise<string> {
+    const { filename } = await this.saveUploadedImage(buffer, originalFilename);
+    return filename;
+  }
+
+  /**
+   * Save uploaded file to disk and return the stored bytes as well, so the
+   * caller can extract features without reading the file back
+   */
+  static async saveUploadedImage(
+    buffer: Buffer,
+    originalFilename: string
+  ): Promise<{ filename: string; data: Buffer }> {
     try {
       const uploadDir = process.env.UPLOAD_DIR || './public/uploads';
       
       // Ensure upload directory exists
       await fs.mkdir(uploadDir, { recursive: true });
 
-      // Generate unique filename
+      // Generate unique filename (random suffix keeps concurrent batch
+      // uploads of identically named files from colliding)
       const timestamp = Date.now();
       const extension = path.extname(originalFilename);
-      const sanitizedName = path.basename(originalFilename, extension).replace(/[^a-zA-Z0-9]/g, '_');
-      const filename = `${timestamp}_${sanitizedName}${extension}`;
+      const sanitizedName = path.basename(originalFilename, extension).replace(UNSAFE_FILENAME_CHARS, '_');
+      const filename = `${timestamp}_${randomBytes(4).toString('hex')}_${sanitizedName}${extension}`;
       const filePath = path.join(uploadDir, filename);
 
-      // Process and save image
-      await sharp(buffer)
+      // Process and save image. libvips shrinks JPEGs on load before the
+      // resize, and skipping optimised Huffman coding avoids a second
+      // entropy-coding pass for a file a few percent larger.
+      const data = await sharp(buffer, { sequentialRead: true })
         .resize(800, 800, { fit: 'inside', withoutEnlargement: true })
-        .jpeg({ quality: 90 })
-        .toFile(filePath);
+        // JPEG has no alpha; composite transparent PNG/WebP/GIF uploads onto
+        // white rather than letting the encoder drop alpha and leave them on
+        // black. sharp applies flatten before resize whatever the call order.
+        .flatten({ background: '#ffffff' })
+        .jpeg({ quality: 90, optimiseCoding: false })
+        .toBuffer();
+      await fs.writeFile(filePath, data);
 
-      console.log(`✅ Saved image: ${filename}`);
-      return filename;
+      logger.debug('Saved image', { filename });
+      return { filename, data };
     } catch (error) {
-      console.error('Error saving file:', error);
+      logger.error('Error saving file', { error });
       throw new Error(`Failed to save uploaded file: ${error.message}`);
     }
   }
 
   /**
-   * Extract comprehensive features from image buffer using Sharp
+   * Extract comprehensive features from image buffer using Sharp.
+   * Falls back to seeded placeholder features if extraction fails.
    */
-  static async extractAdvancedFeatures(imageBuffer: Buffer): Promise<number[]> {
+  static async extractAdvancedFeatures(imageBuffer: Buffer, knownMetadata?: sharp.Metadata): Promise<number[]> {
     try {
-      // Get detailed image statistics
-      const stats = await sharp(imageBuffer).stats();
-      const metadata = await sharp(imageBuffer).metadata();
+      return await this.computeAdvancedFeatures(imageBuffer, knownMetadata);
+    } catch (error) {
+      logger.error('Advanced feature extraction failed', { error });
+      return this.generateFallbackFeatures(error.message);
+    }
+  }
+
+  /**
+   * Extract comprehensive features; throws instead of falling back so
+   * callers that cache results never store a placeholder vector
+   */
+  private static async computeAdvancedFeatures(imageBuffer: Buffer, knownMetadata?: sharp.Metadata): Promise<number[]> {
+    // Decode once into a bounded raw copy for the histogram and texture
+    // passes; dimensions still come from the original header (read by the
+    // caller when it already validated the image)
+    const [metadata, workingImage] = await Promise.all([
+      knownMetadata || sharp(imageBuffer).metadata(),
+      this.createWorkingImage(imageBuffer)
+    ]);
+
+    // sharp runs on the libuv thread pool, so start every pass at once
+    // instead of awaiting them one after another. Channel statistics are
+    // read from the original image: min, max and std shift on a resampled
+    // copy, and stored catalogue vectors were computed at full resolution.
+    const [stats, histogramFeatures, textureFeatures] = await Promise.all([
+      sharp(imageBuffer).stats(),
+      this.extractHistogramFeatures(workingImage),
+      this.extractTextureFeatures(workingImage)
+    ]);
+    
+    const features: number[] = [];
+
+    // 1. Basic metadata features (4 features)
+    const width = metadata.width || 0;
+    const height = metadata.height || 0;
+    features.push(Math.min(width / 1000, 2)); // Normalized width
+    features.push(Math.min(height / 1000, 2)); // Normalized height
+    features.push(width && height ? Math.min(width / height, 5) : 1); // Aspect ratio
+    features.push(width && height ? Math.min((width * height) / 1000000, 2) : 0); // Area
+
+    // 2. Color channel statistics (18 features)
+    if (stats.channels && stats.channels.length >= 3) {
+      const [r, g, b] = stats.channels.slice(0, 3);
       
-      const features: number[] = [];
-
-      // 1. Basic metadata features (4 features)
-      const width = metadata.width || 0;
-      const height = metadata.height || 0;
-      features.push(Math.min(width / 1000, 2)); // Normalized width
-      features.push(Math.min(height / 1000, 2)); // Normalized height
-      features.push(width && height ? Math.min(width / height, 5) : 1); // Aspect ratio
-      features.push(width && height ? Math.min((width * height) / 1000000, 2) : 0); // Area
-
-      // 2. Color channel statistics (18 features)
-      if (stats.channels && stats.channels.length >= 3) {
-        const [r, g, b] = stats.channels.slice(0, 3);
-        
-        // Mean values
-        features.push(r.mean / 255, g.mean / 255, b.mean / 255);
-        
-        // Standard deviations (contrast)
-        features.push(r.std / 255, g.std / 255, b.std / 255);
-        
-        // Min/Max values
-        features.push(r.min / 255, g.min / 255, b.min / 255);
-        features.push(r.max / 255, g.max / 255, b.max / 255);
-        
-        // Channel ranges
-        features.push((r.max - r.min) / 255, (g.max - g.min) / 255, (b.max - b.min) / 255);
-        
-        // Color ratios and relationships
-        const rMean = r.mean, gMean = g.mean, bMean = b.mean;
-        features.push(rMean / (gMean + 1)); // R/G ratio
-        features.push(gMean / (bMean + 1)); // G/B ratio
-        features.push(bMean / (rMean + 1)); // B/R ratio
-      } else {
-        // Fill with neutral values for missing color info
-        for (let i = 0; i < 18; i++) {
-          features.push(0.5);
-        }
+      // Mean values
+      features.push(r.mean / 255, g.mean / 255, b.mean / 255);
+      
+      // Standard deviations (contrast)
+      features.push(r.std / 255, g.std / 255, b.std / 255);
+      
+      // Min/Max values
+      features.push(r.min / 255, g.min / 255, b.min / 255);
+      features.push(r.max / 255, g.max / 255, b.max / 255);
+      
+      // Channel ranges
+      features.push((r.max - r.min) / 255, (g.max - g.min) / 255, (b.max - b.min) / 255);
+      
+      // Color ratios and relationships
+      const rMean = r.mean, gMean = g.mean, bMean = b.mean;
+      features.push(rMean / (gMean + 1)); // R/G ratio
+      features.push(gMean / (bMean + 1)); // G/B ratio
+      features.push(bMean / (rMean + 1)); // B/R ratio
+    } else {
+      // Fill with neutral values for missing color info
+      for (let i = 0; i < 18; i++) {
+        features.push(0.5);
       }
+    }
 
-      // 3. Derived color features (8 features)
-      if (stats.channels && stats.channels.length >= 3) {
-        const [r, g, b] = stats.channels;
-        
-        // Overall brightness
-        const brightness = (r.mean + g.mean + b.mean) / (3 * 255);
-        features.push(brightness);
-        
-        // Overall contrast
-        const contrast = (r.std + g.std + b.std) / (3 * 255);
-        features.push(contrast);
-        
-        // Color dominance
-        const total = r.mean + g.mean + b.mean;
-        if (total > 0) {
-          features.push(r.mean / total, g.mean / total, b.mean / total);
-        } else {
-          features.push(0.33, 0.33, 0.33);
-        }
-        
-        // Saturation approximation
-        const maxChannel = Math.max(r.mean, g.mean, b.mean);
-        const minChannel = Math.min(r.mean, g.mean, b.mean);
-        const saturation = maxChannel > 0 ? (maxChannel - minChannel) / maxChannel : 0;
-        features.push(saturation);
-        
-        // Color temperature approximation (blue vs red+green)
-        const warmth = (r.mean + g.mean) / (b.mean + 1);
-        features.push(Math.min(warmth / 4, 1)); // Normalize
-        
-        // Color variance
-        const colorVariance = Math.sqrt(
-          Math.pow(r.std, 2) + Math.pow(g.std, 2) + Math.pow(b.std, 2)
-        ) / 255;
-        features.push(colorVariance);
+    // 3. Derived color features (8 features)
+    if (stats.channels && stats.channels.length >= 3) {
+      const [r, g, b] = stats.channels;
+      
+      // Overall brightness
+      const brightness = (r.mean + g.mean + b.mean) / (3 * 255);
+      features.push(brightness);
+      
+      // Overall contrast
+      const contrast = (r.std + g.std + b.std) / (3 * 255);
+      features.push(contrast);
+      
+      // Color dominance
+      const total = r.mean + g.mean + b.mean;
+      if (total > 0) {
+        features.push(r.mean / total, g.mean / total, b.mean / total);
       } else {
-        for (let i = 0; i < 8; i++) {
-          features.push(0.5);
-        }
+        features.push(0.33, 0.33, 0.33);
+      }
+      
+      // Saturation approximation
+      const maxChannel = Math.max(r.mean, g.mean, b.mean);
+      const minChannel = Math.min(r.mean, g.mean, b.mean);
+      const saturation = maxChannel > 0 ? (maxChannel - minChannel) / maxChannel : 0;
+      features.push(saturation);
+      
+      // Color temperature approximation (blue vs red+green)
+      const warmth = (r.mean + g.mean) / (b.mean + 1);
+      features.push(Math.min(warmth / 4, 1)); // Normalize
+      
+      // Color variance
+      const colorVariance = Math.sqrt(
+        Math.pow(r.std, 2) + Math.pow(g.std, 2) + Math.pow(b.std, 2)
+      ) / 255;
+      features.push(colorVariance);
+    } else {
+      for (let i = 0; i < 8; i++) {
+        features.push(0.5);
       }
+    }
 
-      // 4. Generate histogram-based features (16 features)
-      const histogramFeatures = await this.extractHistogramFeatures(imageBuffer);
-      features.push(...histogramFeatures);
+    // 4. Histogram-based features (16 features)
+    features.push(...histogramFeatures);
 
-      // 5. Edge and texture features (8 features)
-      const textureFeatures = await this.extractTextureFeatures(imageBuffer);
-      features.push(...textureFeatures);
+    // 5. Edge and texture features (8 features)
+    features.push(...textureFeatures);
 
-      // 6. Ensure exactly 64 features
-      while (features.length < 64) {
-        // Generate meaningful derived features
-        const baseIndex = (features.length - 30) % Math.max(features.length - 30, 1);
-        const baseValue = features[baseIndex] || 0.5;
-        
-        // Add mathematical transformations of existing features
-        let newFeature: number;
-        const transformType = features.length % 4;
-        
-        switch (transformType) {
-          case 0:
-            newFeature = Math.sqrt(Math.abs(baseValue)); // Square root
-            break;
-          case 1:
-            newFeature = baseValue * baseValue; // Square
-            break;
-          case 2:
-            newFeature = Math.sin(baseValue * Math.PI) * 0.5 + 0.5; // Sine transform
-            break;
-          default:
-            newFeature = 1 - baseValue; // Inverse
-        }
-        
-        features.push(Math.max(0, Math.min(1, newFeature)));
+    // 6. Ensure exactly 64 features
+    while (features.length < FEATURE_VECTOR_LENGTH) {
+      // Generate meaningful derived features
+      const baseIndex = (features.length - 30) % Math.max(features.length - 30, 1);
+      const baseValue = features[baseIndex] || 0.5;
+      
+      // Add mathematical transformations of existing features
+      let newFeature: number;
+      const transformType = features.length % 4;
+      
+      switch (transformType) {
+        case 0:
+          newFeature = Math.sqrt(Math.abs(baseValue)); // Square root
+          break;
+        case 1:
+          newFeature = baseValue * baseValue; // Square
+          break;
+        case 2:
+          newFeature = Math.sin(baseValue * Math.PI) * 0.5 + 0.5; // Sine transform
+          break;
+        default:
+          newFeature = 1 - baseValue; // Inverse
       }
-
-      return features.slice(0, 64);
-    } catch (error) {
-      console.error('Advanced feature extraction failed:', error);
-      return this.generateFallbackFeatures(error.message);
+      
+      features.push(Math.max(0, Math.min(1, newFeature)));
     }
+
+    return features.slice(0, FEATURE_VECTOR_LENGTH).map(roundFeature);
+  }
+
+  /**
+   * Decode an image into a raw pixel buffer no larger than WORKING_IMAGE_MAX_SIZE
+   */
+  private static async createWorkingImage(imageBuffer: Buffer): Promise<WorkingImage> {
+    return await sharp(imageBuffer)
+      .resize(WORKING_IMAGE_MAX_SIZE, WORKING_IMAGE_MAX_SIZE, { fit: 'inside', withoutEnlargement: true })
+      .raw()
+      .toBuffer({ resolveWithObject: true });
+  }
+
+  /**
+   * Wrap a working image for another sharp pass without re-decoding it
+   */
+  private static openWorkingImage(workingImage: WorkingImage): sharp.Sharp {
+    const { width, height, channels } = workingImage.info;
+    return sharp(workingImage.data, { raw: { width, height, channels } });
   }
 
   /**
    * Extract histogram-based features
    */
-  private static async extractHistogramFeatures(imageBuffer: Buffer): Promise<number[]> {
-    try {
-      // Resize to small size for histogram analysis
-      const smallImage = await sharp(imageBuffer)
-        .resize(64, 64, { fit: 'cover' })
-        .raw()
-        .toBuffer({ resolveWithObject: true });
-
-      const { data, info } = smallImage;
-      const features: number[] = [];
-
-      if (info.channels >= 3) {
-        // Calculate simple histogram features for each channel
-        for (let channel = 0; channel < 3; channel++) {
-          const values: number[] = [];
-          
-          // Extract channel values
-          for (let i = channel; i < data.length; i += info.channels) {
-            values.push(data[i]);
-          }
+  private static async extractHistogramFeatures(workingImage: WorkingImage): Promise<number[]> {
+    // Resize to small size for histogram analysis
+    const smallImage = await this.openWorkingImage(workingImage)
+      .resize(64, 64, { fit: 'cover' })
+      .raw()
+      .toBuffer({ resolveWithObject: true });
+
+    const { data, info } = smallImage;
+    const features: number[] = [];
 
-          // Calculate quartiles as histogram features
-          values.sort((a, b) => a - b);
-          const len = values.length;
-          
-          features.push(values[Math.floor(len * 0.25)] / 255); // Q1
-          features.push(values[Math.floor(len * 0.5)] / 255);  // Median
-          features.push(values[Math.floor(len * 0.75)] / 255); // Q3
-          
-          // Add skewness approximation
-          const mean = values.reduce((sum, v) => sum + v, 0) / len / 255;
-          const median = values[Math.floor(len * 0.5)] / 255;
-          features.push(mean - median); // Simple skewness measure
+    if (info.channels >= 3) {
+      // Calculate simple histogram features for each channel
+      for (let channel = 0; channel < 3; channel++) {
+        // Pixel values are bytes, so a 256-bin count gives the same
+        // quartiles as sorting the values, in linear time
+        const histogram = new Uint32Array(256);
+        let sum = 0;
+
+        for (let i = channel; i < data.length; i += info.channels) {
+          histogram[data[i]]++;
+          sum += data[i];
         }
 
-        // Add inter-channel correlation approximation
-        const rValues = [], gValues = [], bValues = [];
-        for (let i = 0; i < data.length; i += info.channels) {
-          rValues.push(data[i]);
-          gValues.push(data[i + 1]);
-          bValues.push(data[i + 2]);
-        }
+        // Calculate quartiles as histogram features
+        const len = data.length / info.channels;
+        const median = this.histogramRank(histogram, Math.floor(len * 0.5)) / 255;
 
-        // Simple correlation between channels
-        features.push(this.simpleCorrelation(rValues, gValues));
-        features.push(this.simpleCorrelation(gValues, bValues));
-        features.push(this.simpleCorrelation(rValues, bValues));
-        features.push(this.calculateEntropy(rValues));
-      } else {
-        // Fill with defaults for non-RGB images
-        for (let i = 0; i < 16; i++) {
-          features.push(0.5);
-        }
+        features.push(this.histogramRank(histogram, Math.floor(len * 0.25)) / 255); // Q1
+        features.push(median);  // Median
+        features.push(this.histogramRank(histogram, Math.floor(len * 0.75)) / 255); // Q3
+
+        // Add skewness approximation
+        const mean = sum / len / 255;
+        features.push(mean - median); // Simple skewness measure
       }
 
-      return features.slice(0, 16);
-    } catch (error) {
-      console.error('Histogram extraction failed:', error);
-      return new Array(16).fill(0.5);
+      // Add inter-channel correlation approximation
+      const rValues = [], gValues = [], bValues = [];
+      for (let i = 0; i < data.length; i += info.channels) {
+        rValues.push(data[i]);
+        gValues.push(data[i + 1]);
+        bValues.push(data[i + 2]);
+      }
+
+      // Simple correlation between channels
+      features.push(this.simpleCorrelation(rValues, gValues));
+      features.push(this.simpleCorrelation(gValues, bValues));
+      features.push(this.simpleCorrelation(rValues, bValues));
+      features.push(this.calculateEntropy(rValues));
+    } else {
+      // Fill with defaults for non-RGB images
+      for (let i = 0; i < 16; i++) {
+        features.push(0.5);
+      }
     }
+
+    return features.slice(0, 16);
+  }
+
+  /**
+   * Value at a 0-based rank in sorted order, read from a value histogram
+   */
+  private static histogramRank(histogram: Uint32Array, rank: number): number {
+    let seen = 0;
+    for (let value = 0; value < histogram.length; value++) {
+      seen += histogram[value];
+      if (seen > rank) {
+        return value;
+      }
+    }
+    return histogram.length - 1;
   }
 
   /**
    * Extract texture and edge features
    */
-  private static async extractTextureFeatures(imageBuffer: Buffer): Promise<number[]> {
-    try {
-      // Convert to grayscale and resize for texture analysis
-      const grayImage = await sharp(imageBuffer)
-        .resize(32, 32, { fit: 'cover' })
-        .grayscale()
-        .raw()
-        .toBuffer();
+  private static async extractTextureFeatures(workingImage: WorkingImage): Promise<number[]> {
+    // Convert to grayscale and resize for texture analysis
+    const grayImage = await this.openWorkingImage(workingImage)
+      .resize(32, 32, { fit: 'cover' })
+      .grayscale()
+      .raw()
+      .toBuffer();
 
-      const features: number[] = [];
-      const width = 32;
-
-      // Calculate simple texture measures
-      let horizontalEdges = 0;
-      let verticalEdges = 0;
-      let totalVariation = 0;
-      let localVariances: number[] = [];
-
-      for (let y = 1; y < width - 1; y++) {
-        for (let x = 1; x < width - 1; x++) {
-          const idx = y * width + x;
-          const current = grayImage[idx];
-          
-          // Edge detection (simple gradients)
-          const rightPixel = grayImage[idx + 1];
-          const bottomPixel = grayImage[(y + 1) * width + x];
-          
-          horizontalEdges += Math.abs(current - rightPixel);
-          verticalEdges += Math.abs(current - bottomPixel);
-          
-          // Local variance in 3x3 window
-          const neighbors = [
-            grayImage[(y-1) * width + (x-1)], grayImage[(y-1) * width + x], grayImage[(y-1) * width + (x+1)],
-            grayImage[y * width + (x-1)], current, grayImage[y * width + (x+1)],
-            grayImage[(y+1) * width + (x-1)], grayImage[(y+1) * width + x], grayImage[(y+1) * width + (x+1)]
-          ];
-          
-          const mean = neighbors.reduce((sum, val) => sum + val, 0) / 9;
-          const variance = neighbors.reduce((sum, val) => sum + Math.pow(val - mean, 2), 0) / 9;
-          localVariances.push(variance);
-          
-          totalVariation += Math.abs(current - mean);
+    const features: number[] = [];
+    const width = 32;
+
+    // Calculate simple texture measures
+    let horizontalEdges = 0;
+    let verticalEdges = 0;
+    let totalVariation = 0;
+    const pixelCount = (width - 2) * (width - 2);
+    const localVariances = new Float64Array(pixelCount);
+    let varianceIndex = 0;
+
+    for (let y = 1; y < width - 1; y++) {
+      for (let x = 1; x < width - 1; x++) {
+        const idx = y * width + x;
+        const current = grayImage[idx];
+        
+        // Edge detection (simple gradients)
+        const rightPixel = grayImage[idx + 1];
+        const bottomPixel = grayImage[(y + 1) * width + x];
+        
+        horizontalEdges += Math.abs(current - rightPixel);
+        verticalEdges += Math.abs(current - bottomPixel);
+        
+        // Local variance in 3x3 window from running sums of the
+        // neighbours, so no per-pixel array is allocated. The sums are
+        // integers, so (9 * sumSq - sum^2) / 81 is exact.
+        let sum = 0;
+        let sumOfSquares = 0;
+        for (let offset = idx - width; offset <= idx + width; offset += width) {
+          const left = grayImage[offset - 1];
+          const middle = grayImage[offset];
+          const right = grayImage[offset + 1];
+          sum += left + middle + right;
+          sumOfSquares += left * left + middle * middle + right * right;
         }
-      }
 
-      // Normalize and add features
-      const pixelCount = (width - 2) * (width - 2);
-      features.push(horizontalEdges / (pixelCount * 255)); // Horizontal edge density
-      features.push(verticalEdges / (pixelCount * 255));   // Vertical edge density
-      features.push(totalVariation / (pixelCount * 255));  // Total variation
-      
-      // Texture measures
-      localVariances.sort((a, b) => a - b);
-      const len = localVariances.length;
-      features.push(localVariances[Math.floor(len * 0.25)] / (255 * 255)); // Q1 variance
-      features.push(localVariances[Math.floor(len * 0.5)] / (255 * 255));  // Median variance
-      features.push(localVariances[Math.floor(len * 0.75)] / (255 * 255)); // Q3 variance
-      
-      // Edge direction bias
-      const edgeRatio = horizontalEdges > 0 ? verticalEdges / horizontalEdges : 1;
-      features.push(Math.min(edgeRatio, 3) / 3); // Normalized edge ratio
-      
-      // Overall smoothness
-      const avgVariance = localVariances.reduce((sum, v) => sum + v, 0) / len;
-      features.push(Math.min(avgVariance / (255 * 255), 1));
+        const mean = sum / 9;
+        const variance = (9 * sumOfSquares - sum * sum) / 81;
+        localVariances[varianceIndex++] = variance;
+        
+        totalVariation += Math.abs(current - mean);
+      }
+    }
 
-      return features;
-    } catch (error) {
-      console.error('Texture extraction failed:', error);
-      return new Array(8).fill(0.5);
+    // Normalize and add features
+    features.push(horizontalEdges / (pixelCount * 255)); // Horizontal edge density
+    features.push(verticalEdges / (pixelCount * 255));   // Vertical edge density
+    features.push(totalVariation / (pixelCount * 255));  // Total variation
+    
+    // Texture measures
+    localVariances.sort(); // Typed arrays sort numerically
+    const len = localVariances.length;
+    features.push(localVariances[Math.floor(len * 0.25)] / (255 * 255)); // Q1 variance
+    features.push(localVariances[Math.floor(len * 0.5)] / (255 * 255));  // Median variance
+    features.push(localVariances[Math.floor(len * 0.75)] / (255 * 255)); // Q3 variance
+    
+    // Edge direction bias
+    const edgeRatio = horizontalEdges > 0 ? verticalEdges / horizontalEdges : 1;
+    features.push(Math.min(edgeRatio, 3) / 3); // Normalized edge ratio
+    
+    // Overall smoothness
+    let varianceTotal = 0;
+    for (let i = 0; i < len; i++) {
+      varianceTotal += localVariances[i];
     }
+    const avgVariance = varianceTotal / len;
+    features.push(Math.min(avgVariance / (255 * 255), 1));
+
+    return features;
   }
 
   /**
@@ -416,13 +536,13 @@ export class ImageProcessor {
    * Generate fallback features when image processing fails
    */
   static generateFallbackFeatures(seed: string): number[] {
-    console.warn('Generating fallback features for:', seed);
+    logger.warn('Generating fallback features', { seed });
     
     const features: number[] = [];
     const random = this.seededRandom(seed);
     
     // Generate 64 features with some structure
-    for (let i = 0; i < 64; i++) {
+    for (let i = 0; i < FEATURE_VECTOR_LENGTH; i++) {
       // Create features with different characteristics based on position
       let value: number;
       
@@ -466,7 +586,7 @@ export class ImageProcessor {
   /**
    * Validate image buffer
    */
-  private static async validateImageBuffer(buffer: Buffer): Promise<void> {
+  private static async validateImageBuffer(buffer: Buffer): Promise<sharp.Metadata> {
     try {
       const metadata = await sharp(buffer).metadata();
       
@@ -486,6 +606,8 @@ export class ImageProcessor {
       if (buffer.length > 50 * 1024 * 1024) { // 50MB
         throw new Error('Image buffer too large');
       }
+
+      return metadata;
     } catch (error) {
       if (error.message.includes('Input buffer contains unsupported image format')) {
         throw new Error('Unsupported image format');
@@ -495,9 +617,32 @@ export class ImageProcessor {
   }
 
   /**
-   * Download image with robust error handling
+   * Download image, bounded by the shared download slots and retried with
+   * jittered backoff when the remote host is rate limiting or overloaded
    */
   private static async downloadImage(imageUrl: string): Promise<Buffer> {
+    return downloadSlots.run(async () => {
+      for (let attempt = 1; ; attempt++) {
+        try {
+          return await this.fetchImage(imageUrl);
+        } catch (error) {
+          if (attempt >= DOWNLOAD_MAX_ATTEMPTS || !RETRYABLE_STATUS_CODES.has(error.status)) {
+            throw error;
+          }
+
+          // Full jitter keeps concurrent retries from arriving in lockstep
+          const delayMs = Math.round(Math.random() * DOWNLOAD_RETRY_BASE_MS * 2 ** attempt);
+          logger.warn('Retrying image download', { url: imageUrl, status: error.status, attempt, delayMs });
+          await new Promise(resolve => setTimeout(resolve, delayMs));
+        }
+      }
+    });
+  }
+
+  /**
+   * Fetch image bytes with robust error handling
+   */
+  private static async fetchImage(imageUrl: string): Promise<Buffer> {
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), 15000); // 15 second timeout
 
@@ -510,28 +655,173 @@ export class ImageProcessor {
         }
       });
 
-      clearTimeout(timeoutId);
-
+      // Unread bodies keep their socket checked out, so cancel before
+      // every early throw (and before each retry in downloadImage)
       if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        await response.body?.cancel();
+        const httpError: any = new Error(`Failed to download image: HTTP ${response.status}: ${response.statusText}`);
+        httpError.status = response.status;
+        throw httpError;
       }
 
       const contentType = response.headers.get('content-type');
       if (!contentType || !contentType.startsWith('image/')) {
+        await response.body?.cancel();
         throw new Error(`Invalid content type: ${contentType}`);
       }
 
-      const arrayBuffer = await response.arrayBuffer();
-      return Buffer.from(arrayBuffer);
+      // Refuse declared oversize bodies before reading a single chunk; the
+      // streaming check below still covers missing or dishonest headers
+      const declaredLength = parseInt(response.headers.get('content-length') || '', 10);
+      if (declaredLength > MAX_FILE_SIZE) {
+        await response.body?.cancel();
+        throw new Error(`Image exceeds ${Math.round(MAX_FILE_SIZE / 1024 / 1024)}MB limit`);
+      }
+
+      if (!response.body) {
+        throw new Error('Empty response body');
+      }
+
+      // Stream the body so oversized images are rejected without buffering
+      // them fully; the timeout stays armed until the last chunk arrives.
+      // With a declared length, chunks are copied straight into one buffer
+      // of that size, so there is no final concat; if the body turns out
+      // longer (e.g. a compressed transfer) it falls back to a chunk list.
+      const reader = response.body.getReader();
+      let preallocated = declaredLength > 0 ? Buffer.allocUnsafe(declaredLength) : null;
+      const chunks: Buffer[] = [];
+      let received = 0;
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        if (received + value.byteLength > MAX_FILE_SIZE) {
+          await reader.cancel();
+          throw new Error(`Image exceeds ${Math.round(MAX_FILE_SIZE / 1024 / 1024)}MB limit`);
+        }
+
+        if (preallocated && received + value.byteLength <= preallocated.length) {
+          preallocated.set(value, received);
+        } else {
+          if (preallocated) {
+            chunks.push(preallocated.subarray(0, received));
+            preallocated = null;
+          }
+          chunks.push(Buffer.from(value.buffer, value.byteOffset, value.byteLength));
+        }
+        received += value.byteLength;
+      }
+
+      if (preallocated) {
+        return received === preallocated.length ? preallocated : preallocated.subarray(0, received);
+      }
+      return Buffer.concat(chunks, received);
     } catch (fetchError) {
-      clearTimeout(timeoutId);
-      
       if (fetchError.name === 'AbortError') {
         throw new Error('Image download timeout');
       }
+      if (fetchError.status) {
+        throw fetchError;
+      }
       
       throw new Error(`Failed to download image: ${fetchError.message}`);
+    } finally {
+      clearTimeout(timeoutId);
+    }
+  }
+
+  /**
+   * Hash image bytes for content-addressed caching
+   */
+  private static hashImage(buffer: Buffer): string {
+    return createHash('sha256').update(buffer).digest('hex');
+  }
+
+  /**
+   * Extract features from a validated buffer, reusing cached results for
+   * byte-identical images
+   */
+  private static async extractCachedFeatures(imageBuffer: Buffer, contentHash: string): Promise<number[]> {
+    const cached = this.featureCache.get(contentHash);
+    if (cached) {
+      return cached;
+    }
+
+    // Header metadata is parsed once here and shared with the later passes
+    const metadata = await this.validateImageBuffer(imageBuffer);
+
+    // A thumbnail decode is much cheaper than a full extraction, so check
+    // for a visually identical copy before doing the real work. The tier is
+    // optional: if the thumbnail fails, extract without it.
+    let perceptualKey: string | null = null;
+    try {
+      perceptualKey = await this.perceptualKey(imageBuffer, metadata);
+    } catch (error) {
+      logger.warn('Perceptual hash failed, skipping near-duplicate lookup', { error });
+    }
+
+    const nearDuplicate = perceptualKey && this.featureCache.get(perceptualKey);
+    if (nearDuplicate) {
+      this.featureCache.set(contentHash, nearDuplicate);
+      return nearDuplicate;
+    }
+
+    // Failures propagate so the caller's fallback vector is never cached.
+    // Fallbacks are seeded by the error message and so identical across
+    // images; under a perceptual key they would be served to every
+    // near-duplicate. Both keys are written only after real extraction.
+    const features = await this.computeAdvancedFeatures(imageBuffer, metadata);
+    this.featureCache.set(contentHash, features);
+    if (perceptualKey) {
+      this.featureCache.set(perceptualKey, features);
     }
+    return features;
+  }
+
+  /**
+   * Cache key for visually identical images: dimensions, a difference hash
+   * of the greyscale thumbnail and the coarse mean colour. Dimensions and
+   * colour are part of the key because the feature vector depends on them
+   * and the dHash alone ignores both.
+   */
+  private static async perceptualKey(imageBuffer: Buffer, metadata: sharp.Metadata): Promise<string> {
+    const { data, info } = await sharp(imageBuffer)
+      .removeAlpha()
+      .resize(DHASH_SIZE + 1, DHASH_SIZE, { fit: 'fill' })
+      .raw()
+      .toBuffer({ resolveWithObject: true });
+
+    const channels = info.channels;
+    const luma = new Float64Array((DHASH_SIZE + 1) * DHASH_SIZE);
+    const colourTotals = [0, 0, 0];
+
+    for (let i = 0; i < luma.length; i++) {
+      const offset = i * channels;
+      const r = data[offset];
+      const g = channels >= 3 ? data[offset + 1] : r;
+      const b = channels >= 3 ? data[offset + 2] : r;
+      luma[i] = 0.299 * r + 0.587 * g + 0.114 * b;
+      colourTotals[0] += r;
+      colourTotals[1] += g;
+      colourTotals[2] += b;
+    }
+
+    let dHash = '';
+    for (let row = 0; row < DHASH_SIZE; row++) {
+      let bits = 0;
+      for (let col = 0; col < DHASH_SIZE; col++) {
+        const index = row * (DHASH_SIZE + 1) + col;
+        bits = (bits << 1) | (luma[index] < luma[index + 1] ? 1 : 0);
+      }
+      dHash += bits.toString(16).padStart(2, '0');
+    }
+
+    const colourBucket = colourTotals
+      .map(total => Math.floor(total / luma.length / 16).toString(16))
+      .join('');
+
+    return `p:${metadata.width}x${metadata.height}:${dHash}:${colourBucket}`;
   }
 
   /**
@@ -544,37 +834,67 @@ export class ImageProcessor {
       }
 
       const imageBuffer = await fs.readFile(filePath);
-      await this.validateImageBuffer(imageBuffer);
-      
-      return await this.extractAdvancedFeatures(imageBuffer);
+      return await this.extractCachedFeatures(imageBuffer, this.hashImage(imageBuffer));
     } catch (error) {
-      console.error('Error extracting features from file:', error);
+      logger.error('Error extracting features from file', { error });
       return this.generateFallbackFeatures(filePath);
     }
   }
 
   /**
-   * Extract features from image URL
+   * Extract features from image bytes already in memory
    */
-  static async extractFeaturesFromURL(imageUrl: string): Promise<number[]> {
+  static async extractFeaturesFromBuffer(imageBuffer: Buffer, fallbackSeed: string): Promise<number[]> {
     try {
       if (!this.isInitialized) {
         await this.initialize();
       }
 
-      const imageBuffer = await this.downloadImage(imageUrl);
-      await this.validateImageBuffer(imageBuffer);
-      
-      return await this.extractAdvancedFeatures(imageBuffer);
+      return await this.extractCachedFeatures(imageBuffer, this.hashImage(imageBuffer));
     } catch (error) {
-      console.error('Error extracting features from URL:', error);
-      console.error('URL:', imageUrl);
+      logger.error('Error extracting features from buffer', { error });
+      return this.generateFallbackFeatures(fallbackSeed);
+    }
+  }
+
+  /**
+   * Extract features from image URL.
+   * Falls back to seeded placeholder features if download or extraction fails.
+   */
+  static async extractFeaturesFromURL(imageUrl: string): Promise<number[]> {
+    try {
+      return await this.computeFeaturesFromURL(imageUrl);
+    } catch (error) {
+      logger.error('Error extracting features from URL', { error, url: imageUrl });
       
       // Generate fallback features based on URL
       return this.generateFallbackFeatures(imageUrl);
     }
   }
 
+  /**
+   * Extract features from image URL; throws instead of falling back so
+   * callers that persist results never store a placeholder vector
+   */
+  static async computeFeaturesFromURL(imageUrl: string): Promise<number[]> {
+    if (!this.isInitialized) {
+      await this.initialize();
+    }
+
+    const knownHash = this.urlHashCache.get(imageUrl);
+    const cached = knownHash && this.featureCache.get(knownHash);
+    if (cached) {
+      return cached;
+    }
+
+    const imageBuffer = await this.downloadImage(imageUrl);
+    const contentHash = this.hashImage(imageBuffer);
+    const features = await this.extractCachedFeatures(imageBuffer, contentHash);
+    this.urlHashCache.set(imageUrl, contentHash);
+
+    return features;
+  }
+
   /**
    * Extract simple features (legacy method)
    */
@@ -587,7 +907,9 @@ export class ImageProcessor {
    */
   static dispose(): void {
     this.isInitialized = false;
-    console.log('ImageProcessor disposed');
+    this.featureCache.clear();
+    this.urlHashCache.clear();
+    logger.info('ImageProcessor disposed');
   }
 
   /**
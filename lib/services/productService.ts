@@ -1,16 +1,150 @@
 import { executeQuery, Product, SearchResult } from "../database";
+import { LRUCache } from "../cache";
+import { logger } from "../logger";
+
+// Matches the InnoDB default innodb_ft_min_token_size
+const MIN_FULLTEXT_TERM_LENGTH = 3;
+
+// Categories and counts change rarely but are requested on every page load
+const METADATA_CACHE_TTL_MS = 5 * 60 * 1000; // 5 minutes
+const metadataCache = new LRUCache<string, any>(16, METADATA_CACHE_TTL_MS);
+
+// Every similarity search scans the feature catalogue (or one category of
+// it); repeat searches within this window reuse it instead of re-reading
+// every row. One entry for the full catalogue plus one per category.
+const CATALOG_CACHE_TTL_MS = 60 * 1000; // 1 minute
+const CATALOG_CACHE_ENTRIES = 32;
+const catalogCache = new LRUCache<string, Product[]>(
+  CATALOG_CACHE_ENTRIES,
+  CATALOG_CACHE_TTL_MS
+);
+
+// Position of the last row of a page in (name, id) order
+export interface ProductCursor {
+  name: string;
+  id: number;
+}
+
+export interface PaginationOptions {
+  limit?: number;
+  after?: ProductCursor;
+  // Subset of PRODUCT_COLUMNS to select; defaults to LISTING_COLUMNS
+  columns?: string[];
+}
+
+const PRODUCT_COLUMNS = [
+  "id",
+  "name",
+  "category",
+  "image_url",
+  "price",
+  "description",
+  "features",
+  "created_at",
+  "updated_at",
+];
+
+const PRODUCT_COLUMN_SET = new Set(PRODUCT_COLUMNS);
+
+// Listing and search responses never use the feature vector, which is by
+// far the largest column; leave it on the server
+const LISTING_COLUMNS = PRODUCT_COLUMNS.filter(
+  (column) => column !== "features"
+);
+
+// Only whitelisted names reach the SQL text. The cursor needs name and id.
+function buildSelectList(columns: string[] = LISTING_COLUMNS): string {
+  const selected = new Set(
+    columns.filter((column) => PRODUCT_COLUMN_SET.has(column))
+  );
+  selected.add("id");
+  selected.add("name");
+  return Array.from(selected).join(", ");
+}
+
+// Keyset pagination: seek past the previous page's last (name, id) instead
+// of scanning and discarding OFFSET rows. LIMIT is bound as a string since
+// MySQL 8 rejects numeric LIMIT parameters in prepared statements.
+function buildPagination({ limit, after }: PaginationOptions): {
+  seekCondition: string;
+  seekParams: any[];
+  limitClause: string;
+  limitParams: string[];
+} {
+  return {
+    seekCondition: after ? "name >= ? AND (name > ? OR id > ?)" : "",
+    seekParams: after ? [after.name, after.name, after.id] : [],
+    limitClause: limit ? "LIMIT ?" : "",
+    limitParams: limit ? [String(limit)] : [],
+  };
+}
+
+interface SearchQueries {
+  prefix: string;
+  fulltext: string;
+}
+
+// Search SQL is built once per shape (with or without a category filter)
+// so every call sends byte-identical text and reuses the prepared statement
+// mysql2 caches per connection for that text.
+//
+// Each statement fuses the exact slug lookup (match_rank 1) with the ranked
+// branch (match_rank 0) in one UNION ALL round-trip. Each branch keeps its
+// own index: a single WHERE with OR would stop MySQL from using either.
+const searchQueryCache = new Map<boolean, SearchQueries>();
+
+function getSearchQueries(withCategory: boolean): SearchQueries {
+  let queries = searchQueryCache.get(withCategory);
+  if (!queries) {
+    const columns = buildSelectList();
+    const categoryClause = withCategory ? "AND category = ?" : "";
+    const exactBranch = `(SELECT ${columns}, 1 AS match_rank, NULL AS score FROM products WHERE search_slug = ? ${categoryClause} ORDER BY id ASC LIMIT ?)`;
+    const order = "ORDER BY match_rank DESC, score DESC, name ASC";
+    queries = {
+      prefix: `${exactBranch} UNION ALL (SELECT ${columns}, 0, NULL FROM products WHERE name LIKE ? ${categoryClause} ORDER BY name ASC LIMIT ?) ${order}`,
+      fulltext: `${exactBranch} UNION ALL (SELECT ${columns}, 0, MATCH(name, description, category) AGAINST (? IN NATURAL LANGUAGE MODE) AS score FROM products WHERE MATCH(name, description, category) AGAINST (? IN NATURAL LANGUAGE MODE) ${categoryClause} ORDER BY score DESC LIMIT ?) ${order}`,
+    };
+    searchQueryCache.set(withCategory, queries);
+  }
+  return queries;
+}
+
+// Mirrors the search_slug generated column:
+// LOWER(REPLACE(TRIM(name), ' ', '-'))
+function toSearchSlug(value: string): string {
+  return value.trim().toLowerCase().replace(/ /g, "-");
+}
+
+function parseFeatures(value: unknown): number[] {
+  if (Array.isArray(value)) {
+    return value;
+  }
+  if (typeof value === "string" && value) {
+    return JSON.parse(value);
+  }
+  return [];
+}
 
 export class ProductService {
   /**
    * Get all products from database
    */
-  static async getAllProducts(): Promise<Product[]> {
+  static async getAllProducts(
+    options: PaginationOptions = {}
+  ): Promise<Product[]> {
     try {
-      const query = "SELECT * FROM products ORDER BY name ASC";
-      const results = await executeQuery(query);
+      const pagination = buildPagination(options);
+      const where = pagination.seekCondition
+        ? `WHERE ${pagination.seekCondition}`
+        : "";
+      const query = `SELECT ${buildSelectList(options.columns)} FROM products ${where} ORDER BY name ASC, id ASC ${pagination.limitClause}`;
+      const results = await executeQuery(query, [
+        ...pagination.seekParams,
+        ...pagination.limitParams,
+      ]);
       return results as Product[];
     } catch (error) {
-      console.error("Error fetching products:", error);
+      logger.error("Error fetching products", { error });
       throw new Error("Failed to fetch products");
     }
   }
@@ -18,33 +152,77 @@ export class ProductService {
   /**
    * Get products by category
    */
-  static async getProductsByCategory(category: string): Promise<Product[]> {
+  static async getProductsByCategory(
+    category: string,
+    options: PaginationOptions = {}
+  ): Promise<Product[]> {
     try {
       if (!category) {
-        return await this.getAllProducts();
+        return await this.getAllProducts(options);
       }
 
-      const query =
-        "SELECT * FROM products WHERE category = ? ORDER BY name ASC";
-      const results = await executeQuery(query, [category]);
+      // Served by idx_category_name (category, name[, id])
+      const pagination = buildPagination(options);
+      const seek = pagination.seekCondition
+        ? `AND ${pagination.seekCondition}`
+        : "";
+      const query = `SELECT ${buildSelectList(options.columns)} FROM products WHERE category = ? ${seek} ORDER BY name ASC, id ASC ${pagination.limitClause}`;
+      const results = await executeQuery(query, [
+        category,
+        ...pagination.seekParams,
+        ...pagination.limitParams,
+      ]);
       return results as Product[];
     } catch (error) {
-      console.error("Error fetching products by category:", error);
+      logger.error("Error fetching products by category", { error });
       throw new Error("Failed to fetch products by category");
     }
   }
 
   /**
-   * Get unique categories
+   * Encode the position after a product as an opaque page cursor
+   */
+  static encodeCursor(product: Pick<Product, "name" | "id">): string {
+    return Buffer.from(JSON.stringify([product.name, product.id])).toString(
+      "base64url"
+    );
+  }
+
+  /**
+   * Decode a page cursor; returns null when it is malformed
+   */
+  static decodeCursor(cursor: string): ProductCursor | null {
+    try {
+      const [name, id] = JSON.parse(
+        Buffer.from(cursor, "base64url").toString("utf8")
+      );
+      if (typeof name !== "string" || !Number.isInteger(id)) {
+        return null;
+      }
+      return { name, id };
+    } catch {
+      return null;
+    }
+  }
+
+  /**
+   * Get unique categories (cached)
    */
   static async getCategories(): Promise<string[]> {
+    const cached = metadataCache.get("categories");
+    if (cached) {
+      return cached;
+    }
+
     try {
       const query =
         "SELECT DISTINCT category FROM products ORDER BY category ASC";
       const results = await executeQuery(query);
-      return results.map((row: any) => row.category);
+      const categories = results.map((row: any) => row.category);
+      metadataCache.set("categories", categories);
+      return categories;
     } catch (error) {
-      console.error("Error fetching categories:", error);
+      logger.error("Error fetching categories", { error });
       throw new Error("Failed to fetch categories");
     }
   }
@@ -58,7 +236,7 @@ export class ProductService {
       const results = await executeQuery(query, [id]);
       return results.length > 0 ? (results[0] as Product) : null;
     } catch (error) {
-      console.error("Error fetching product by ID:", error);
+      logger.error("Error fetching product by ID", { error });
       throw new Error("Failed to fetch product");
     }
   }
@@ -67,17 +245,70 @@ export class ProductService {
    * Search products by name
    */
   static async searchProducts(searchTerm: string): Promise<Product[]> {
+    return await this.searchProductsFulltext(searchTerm);
+  }
+
+  /**
+   * Ranked text search backed by the ft_products FULLTEXT index.
+   * Queries shorter than the InnoDB minimum token size fall back to a
+   * prefix match on name, which can still use idx_name.
+   */
+  static async searchProductsFulltext(
+    searchTerm: string,
+    category?: string,
+    limit: number = 50
+  ): Promise<Product[]> {
     try {
-      const query = `
-        SELECT * FROM products 
-        WHERE name LIKE ? OR description LIKE ? 
-        ORDER BY name ASC
-      `;
-      const term = `%${searchTerm}%`;
-      const results = await executeQuery(query, [term, term]);
-      return results as Product[];
+      const term = searchTerm.trim();
+      if (!term) {
+        return [];
+      }
+
+      const queries = getSearchQueries(Boolean(category));
+      const categoryParams = category ? [category] : [];
+      const limitParam = String(limit);
+
+      // Exact name matches come from an equality lookup on idx_search_slug
+      // and rank ahead of everything else
+      const exactParams = [toSearchSlug(term), ...categoryParams, limitParam];
+
+      let rows: any[];
+      if (term.length < MIN_FULLTEXT_TERM_LENGTH) {
+        const prefix = `${term.replace(/[\\%_]/g, "\\$&")}%`;
+        rows = await executeQuery(queries.prefix, [
+          ...exactParams,
+          prefix,
+          ...categoryParams,
+          limitParam,
+        ]);
+      } else {
+        rows = await executeQuery(queries.fulltext, [
+          ...exactParams,
+          term,
+          term,
+          ...categoryParams,
+          limitParam,
+        ]);
+      }
+
+      // An exact match usually also appears in the ranked branch; keep its
+      // first (exact) occurrence only. match_rank and score exist only for
+      // ordering and are not part of the returned product.
+      const seen = new Set<number>();
+      const results: Product[] = [];
+      for (const { match_rank, score, ...product } of rows) {
+        if (seen.has(product.id)) {
+          continue;
+        }
+        seen.add(product.id);
+        results.push(product as Product);
+        if (results.length === limit) {
+          break;
+        }
+      }
+      return results;
     } catch (error) {
-      console.error("Error searching products:", error);
+      logger.error("Error searching products", { error });
       throw new Error("Failed to search products");
     }
   }
@@ -103,9 +334,11 @@ export class ProductService {
       ];
 
       const result: any = await executeQuery(query, params);
+      this.invalidateMetadataCache();
+      catalogCache.clear();
       return result.insertId;
     } catch (error) {
-      console.error("Error adding product:", error);
+      logger.error("Error adding product", { error });
       throw new Error("Failed to add product");
     }
   }
@@ -120,42 +353,66 @@ export class ProductService {
     try {
       const query = "UPDATE products SET features = ? WHERE id = ?";
       await executeQuery(query, [JSON.stringify(features), id]);
+      catalogCache.clear();
       return true;
     } catch (error) {
-      console.error("Error updating product features:", error);
+      logger.error("Error updating product features", { error });
       throw new Error("Failed to update product features");
     }
   }
 
   /**
-   * Get products with features for similarity matching
+   * Get products with features for similarity matching (cached briefly).
+   * A category narrows the scan in SQL via idx_category_name.
    */
-  static async getProductsWithFeatures(): Promise<Product[]> {
+  static async getProductsWithFeatures(category?: string): Promise<Product[]> {
+    const cacheKey = category ? `category:${category}` : "all";
+    const cached = catalogCache.get(cacheKey);
+    if (cached) {
+      return cached;
+    }
+
     try {
-      const query =
-        "SELECT * FROM products WHERE features IS NOT NULL ORDER BY id ASC";
-      const results = await executeQuery(query);
+      const columns = buildSelectList(PRODUCT_COLUMNS);
+      const results = category
+        ? await executeQuery(
+            `SELECT ${columns} FROM products WHERE category = ? AND features IS NOT NULL ORDER BY id ASC`,
+            [category]
+          )
+        : await executeQuery(
+            `SELECT ${columns} FROM products WHERE features IS NOT NULL ORDER BY id ASC`
+          );
 
-      return results.map((product: any) => ({
+      // mysql2 already decodes JSON columns; only servers that store JSON
+      // as text (e.g. MariaDB's LONGTEXT alias) hand back a string
+      const products = results.map((product: any) => ({
         ...product,
-        features: product.features ? JSON.parse(product.features) : [],
+        features: parseFeatures(product.features),
       })) as Product[];
+      catalogCache.set(cacheKey, products);
+      return products;
     } catch (error) {
-      console.error("Error fetching products with features:", error);
+      logger.error("Error fetching products with features", { error });
       throw new Error("Failed to fetch products with features");
     }
   }
 
   /**
-   * Get product count
+   * Get product count (cached)
    */
   static async getProductCount(): Promise<number> {
+    const cached = metadataCache.get("productCount");
+    if (cached !== undefined) {
+      return cached;
+    }
+
     try {
       const query = "SELECT COUNT(*) as count FROM products";
       const results = await executeQuery(query);
+      metadataCache.set("productCount", results[0].count);
       return results[0].count;
     } catch (error) {
-      console.error("Error getting product count:", error);
+      logger.error("Error getting product count", { error });
       throw new Error("Failed to get product count");
     }
   }
@@ -167,13 +424,23 @@ export class ProductService {
     try {
       const query = "DELETE FROM products WHERE id = ?";
       const result: any = await executeQuery(query, [id]);
+      this.invalidateMetadataCache();
+      catalogCache.clear();
       return result.affectedRows > 0;
     } catch (error) {
-      console.error("Error deleting product:", error);
+      logger.error("Error deleting product", { error });
       throw new Error("Failed to delete product");
     }
   }
 
+  /**
+   * Drop cached categories/counts after a product is added or removed
+   */
+  static invalidateMetadataCache(): void {
+    metadataCache.delete("categories");
+    metadataCache.delete("productCount");
+  }
+
   /**
    * Batch update product features
    */
@@ -190,9 +457,10 @@ export class ProductService {
         ]);
       }
 
+      catalogCache.clear();
       return true;
     } catch (error) {
-      console.error("Error batch updating features:", error);
+      logger.error("Error batch updating features", { error });
       throw new Error("Failed to batch update features");
     }
   }
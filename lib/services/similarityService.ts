@@ -1,6 +1,12 @@
 import { ProductService } from './productService';
 import { ImageProcessor } from './imageProcessor';
 import { Product, SearchResult } from '../database';
+import { logger } from '../logger';
+import { Semaphore } from '../concurrency';
+
+// Products processed at once during batch runs. Downloads are further
+// bounded by ImageProcessor's own download slots.
+const BATCH_CONCURRENCY = parseInt(process.env.BATCH_CONCURRENCY || '8');
 
 export interface SimilarityOptions {
   categoryFilter?: string;
@@ -17,26 +23,39 @@ export interface SimilarityStats {
   categories: { [key: string]: number };
 }
 
+export interface BatchProgress {
+  productId: number;
+  processed: number;
+  total: number;
+  success: boolean;
+}
+
 export class SimilarityService {
   /**
-   * Calculate cosine similarity between two feature vectors
+   * Euclidean norm of a feature vector
    */
-  private static cosineSimilarity(a: number[], b: number[]): number {
-    if (a.length !== b.length) {
-      throw new Error('Feature vectors must have the same length');
+  private static vectorNorm(vector: number[]): number {
+    let sum = 0;
+    for (let i = 0; i < vector.length; i++) {
+      sum += vector[i] * vector[i];
     }
+    return Math.sqrt(sum);
+  }
 
+  /**
+   * Calculate cosine similarity between two feature vectors of equal length.
+   * The norm of `a` is passed in so it is computed once per query rather
+   * than once per product.
+   */
+  private static cosineSimilarity(a: number[], b: number[], normA: number = this.vectorNorm(a)): number {
     let dotProduct = 0;
-    let normA = 0;
     let normB = 0;
 
     for (let i = 0; i < a.length; i++) {
       dotProduct += a[i] * b[i];
-      normA += a[i] * a[i];
       normB += b[i] * b[i];
     }
 
-    normA = Math.sqrt(normA);
     normB = Math.sqrt(normB);
 
     if (normA === 0 || normB === 0) {
@@ -47,16 +66,13 @@ export class SimilarityService {
   }
 
   /**
-   * Calculate Euclidean distance between two feature vectors
+   * Calculate Euclidean distance between two feature vectors of equal length
    */
   private static euclideanDistance(a: number[], b: number[]): number {
-    if (a.length !== b.length) {
-      throw new Error('Feature vectors must have the same length');
-    }
-
     let sum = 0;
     for (let i = 0; i < a.length; i++) {
-      sum += Math.pow(a[i] - b[i], 2);
+      const diff = a[i] - b[i];
+      sum += diff * diff;
     }
 
     return Math.sqrt(sum);
@@ -77,59 +93,77 @@ export class SimilarityService {
     options: SimilarityOptions = {}
   ): Promise<SearchResult[]> {
     try {
-      // Get products with features
-      const products = await ProductService.getProductsWithFeatures();
+      // Per-query values, resolved once outside the per-product loop
+      const useEuclidean = options.method === 'euclidean';
+      const minSimilarity = options.minSimilarity || 0;
+      const queryNorm = useEuclidean ? 0 : this.vectorNorm(queryFeatures);
+
+      // Both scores are capped at 1, and cosine against a zero vector is
+      // always 0; when nothing can clear the threshold, skip the catalogue
+      // load entirely
+      if (minSimilarity > 1 || (!useEuclidean && queryNorm === 0 && minSimilarity > 0)) {
+        return [];
+      }
+
+      // Get products with features, filtered to the category in SQL
+      const products = await ProductService.getProductsWithFeatures(options.categoryFilter);
       
+      // An empty category is simply no match; an empty catalogue is an error
+      if (products.length === 0 && options.categoryFilter) {
+        return [];
+      }
       if (products.length === 0) {
         throw new Error('No products with features found in database');
       }
 
-      const results: SearchResult[] = [];
+      // Score first and keep only (product, score) pairs; result objects are
+      // built for the returned top matches, not for every catalogue row
+      const scored: Array<{ product: Product; similarity: number }> = [];
 
       for (const product of products) {
-        if (!product.features || product.features.length === 0) {
-          continue;
-        }
-
-        // Skip if category filter is applied and doesn't match
-        if (options.categoryFilter && product.category !== options.categoryFilter) {
+        // A vector of another length (e.g. from an older extractor) cannot be
+        // compared; skip it rather than failing the whole search
+        if (!product.features || product.features.length !== queryFeatures.length) {
           continue;
         }
 
         let similarity: number;
 
         // Calculate similarity based on method
-        if (options.method === 'euclidean') {
+        if (useEuclidean) {
           const distance = this.euclideanDistance(queryFeatures, product.features);
           similarity = this.distanceToSimilarity(distance);
         } else {
           // Default to cosine similarity
-          similarity = this.cosineSimilarity(queryFeatures, product.features);
+          similarity = this.cosineSimilarity(queryFeatures, product.features, queryNorm);
         }
 
         // Skip if below minimum similarity threshold
-        if (similarity < (options.minSimilarity || 0)) {
+        if (similarity < minSimilarity) {
           continue;
         }
 
-        const searchResult: SearchResult = {
-          ...product,
-          similarity,
-          matchScore: Math.round(similarity * 100)
-        };
-
-        results.push(searchResult);
+        scored.push({ product, similarity });
       }
 
       // Sort by similarity (highest first)
-      results.sort((a, b) => b.similarity - a.similarity);
+      scored.sort((a, b) => b.similarity - a.similarity);
 
       // Limit results
       const maxResults = options.maxResults || 50;
-      return results.slice(0, maxResults);
+      return scored.slice(0, maxResults).map(({ product, similarity }) => {
+        // Leave the 64-float feature vector out of the response; clients only
+        // render product fields and scores
+        const { features, ...productFields } = product;
+        return {
+          ...productFields,
+          similarity,
+          matchScore: Math.round(similarity * 100)
+        };
+      });
 
     } catch (error) {
-      console.error('Error finding similar products:', error);
+      logger.error('Error finding similar products', { error });
       throw new Error('Failed to find similar products');
     }
   }
@@ -148,68 +182,90 @@ export class SimilarityService {
       };
     }
 
-    const similarities = results.map(r => r.similarity);
     const categories: { [key: string]: number } = {};
-
-    // Count categories
-    results.forEach(result => {
+    let sum = 0;
+    let min = Infinity;
+    let max = -Infinity;
+
+    // One pass for the aggregates and category counts; no intermediate
+    // array, and no spread arguments that overflow the stack on large sets
+    for (const result of results) {
+      const similarity = result.similarity;
+      sum += similarity;
+      if (similarity < min) min = similarity;
+      if (similarity > max) max = similarity;
       categories[result.category] = (categories[result.category] || 0) + 1;
-    });
+    }
 
     return {
       total: results.length,
-      avg: similarities.reduce((sum, sim) => sum + sim, 0) / similarities.length,
-      min: Math.min(...similarities),
-      max: Math.max(...similarities),
+      avg: sum / results.length,
+      min,
+      max,
       categories
     };
   }
 
   /**
-   * Batch process all products to extract features
+   * Batch process all products to extract features.
+   * onProgress is called as each product finishes, in completion order.
    */
-  static async batchProcessProducts(): Promise<void> {
+  static async batchProcessProducts(onProgress?: (progress: BatchProgress) => void): Promise<void> {
     try {
-      console.log('Starting batch processing of products...');
+      logger.info('Starting batch processing of products...');
+      const startedAt = performance.now();
       
       // Initialize image processor
       await ImageProcessor.initialize();
 
       // Get all products without features
-      const products = await ProductService.getAllProducts();
+      const products = await ProductService.getAllProducts({ columns: ['id', 'name', 'image_url'] });
       
       const productsToUpdate: Array<{ id: number; features: number[] }> = [];
 
-      for (const product of products) {
+      // Each product is a network round-trip plus a decode; overlap them
+      // instead of paying for every one in sequence
+      const slots = new Semaphore(BATCH_CONCURRENCY);
+      let processed = 0;
+
+      await Promise.all(products.map(product => slots.run(async () => {
+        let success = false;
         try {
-          console.log(`Processing product ${product.id}: ${product.name}`);
+          logger.debug('Processing product', { productId: product.id, name: product.name });
           
-          // Extract features from product image
-          const features = await ImageProcessor.extractFeaturesFromURL(product.image_url);
+          // Extract features from product image; the throwing variant keeps
+          // a failed download from saving a placeholder vector
+          const features = await ImageProcessor.computeFeaturesFromURL(product.image_url);
           
           productsToUpdate.push({
             id: product.id,
             features
           });
 
-          console.log(`✓ Processed product ${product.id} (${features.length} features)`);
+          logger.debug('Processed product', { productId: product.id, featureCount: features.length });
+          success = true;
           
         } catch (error) {
-          console.error(`✗ Failed to process product ${product.id}:`, error);
+          logger.error('Failed to process product', { productId: product.id, error });
           // Continue with next product
         }
-      }
+
+        processed++;
+        onProgress?.({ productId: product.id, processed, total: products.length, success });
+      })));
 
       // Batch update features
       if (productsToUpdate.length > 0) {
         await ProductService.batchUpdateFeatures(productsToUpdate);
-        console.log(`✓ Updated features for ${productsToUpdate.length} products`);
+        logger.info('Updated product features', { count: productsToUpdate.length });
       }
 
-      console.log('Batch processing completed successfully');
+      logger.info('Batch processing completed successfully', {
+        durationMs: Math.round(performance.now() - startedAt)
+      });
       
     } catch (error) {
-      console.error('Batch processing failed:', error);
+      logger.error('Batch processing failed', { error });
       throw new Error('Batch processing failed');
     }
   }
@@ -252,7 +308,7 @@ export class SimilarityService {
     try {
       return await ImageProcessor.extractSimpleFeatures(imageBuffer);
     } catch (error) {
-      console.error('Error extracting simple features:', error);
+      logger.error('Error extracting simple features', { error });
       throw new Error('Failed to extract image features');
     }
   }
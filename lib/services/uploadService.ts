@@ -0,0 +1,92 @@
+import path from 'path';
+import multer from 'multer';
+import { NextApiRequest, NextApiResponse } from 'next';
+import { ImageProcessor } from './imageProcessor';
+import { executeQuery } from '../database';
+
+export const MAX_BATCH_FILES = parseInt(process.env.MAX_BATCH_FILES || '10');
+
+const ALLOWED_UPLOAD_TYPES = new Set(['image/jpeg', 'image/jpg', 'image/png', 'image/webp']);
+
+// Shared multer instance for single and batch image uploads
+export const imageUpload = multer({
+  storage: multer.memoryStorage(),
+  limits: {
+    fileSize: parseInt(process.env.MAX_FILE_SIZE || '10485760'), // 10MB
+    files: MAX_BATCH_FILES,
+  },
+  fileFilter: (req, file, cb) => {
+    if (ALLOWED_UPLOAD_TYPES.has(file.mimetype)) {
+      cb(null, true);
+    } else {
+      cb(new Error('Invalid file type. Only JPEG, PNG, and WebP are allowed.'));
+    }
+  },
+});
+
+// Middleware to run multer
+export const runMiddleware = (req: NextApiRequest, res: NextApiResponse, fn: any) => {
+  return new Promise((resolve, reject) => {
+    fn(req, res, (result: any) => {
+      if (result instanceof Error) {
+        return reject(result);
+      }
+      return resolve(result);
+    });
+  });
+};
+
+export interface UploadRecord {
+  imagePath: string;
+  originalFilename: string;
+  features: number[];
+}
+
+export class UploadService {
+  /**
+   * Validate, save and extract features from an uploaded file
+   */
+  static async processUploadedFile(file: {
+    buffer: Buffer;
+    originalname: string;
+    mimetype: string;
+    size: number;
+  }): Promise<UploadRecord> {
+    ImageProcessor.validateImageFile(file);
+
+    // Extract from the bytes just written instead of reading the file back
+    const { filename, data } = await ImageProcessor.saveUploadedImage(file.buffer, file.originalname);
+    const filePath = path.join(process.env.UPLOAD_DIR || './public/uploads', filename);
+    const features = await ImageProcessor.extractFeaturesFromBuffer(data, filePath);
+
+    return { imagePath: filename, originalFilename: file.originalname, features };
+  }
+
+  /**
+   * Record processed uploads, one INSERT per row.
+   * Returns the new upload ids in input order.
+   */
+  static async recordUploads(uploads: UploadRecord[], sessionId: string): Promise<number[]> {
+    // A multi-row INSERT only reports its first id, and the rest are not
+    // guaranteed consecutive (innodb_autoinc_lock_mode=2, the MySQL 8
+    // default, or auto_increment_increment > 1). Separate statements each
+    // report their own id and still run in parallel on the pool.
+    return Promise.all(
+      uploads.map(async upload => {
+        const result: any = await executeQuery(
+          'INSERT INTO user_uploads (image_path, original_filename, features, session_id) VALUES (?, ?, ?, ?)',
+          [upload.imagePath, upload.originalFilename, JSON.stringify(upload.features), sessionId]
+        );
+        return result.insertId as number;
+      })
+    );
+  }
+
+  /**
+   * Record a single processed upload
+   */
+  static async recordUpload(upload: UploadRecord, sessionId: string): Promise<number> {
+    const [uploadId] = await this.recordUploads([upload], sessionId);
+    return uploadId;
+  }
+}
@@ -118,17 +118,6 @@ const nextConfig = {
 
   // Generate ETags
   generateEtags: true,
-
-  // Redirects
-  async redirects() {
-    return [
-      {
-        source: '/app',
-        destination: '/app.tsx',
-        permanent: false,
-      }
-    ];
-  },
 };
 
 module.exports = nextConfig;
\ No newline at end of file
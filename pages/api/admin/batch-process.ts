@@ -19,6 +19,12 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
     });
   }
 
+  // Clients that accept NDJSON get one progress line per product as it
+  // finishes instead of waiting on a silent request for the whole run
+  if (String(req.headers.accept || '').includes('application/x-ndjson')) {
+    return streamBatchProcess(res);
+  }
+
   try {
     // Initialize image processor
     await ImageProcessor.initialize();
@@ -41,6 +47,43 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
   }
 }
 
+async function streamBatchProcess(res: NextApiResponse) {
+  res.writeHead(200, {
+    'Content-Type': 'application/x-ndjson',
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+  });
+
+  const writeLine = (entry: Record<string, any>) => {
+    res.write(JSON.stringify(entry) + '\n');
+  };
+
+  try {
+    await ImageProcessor.initialize();
+
+    console.log('Starting batch processing of products...');
+    await SimilarityService.batchProcessProducts(progress => {
+      writeLine({ type: 'progress', ...progress });
+    });
+
+    writeLine({
+      type: 'done',
+      success: true,
+      message: 'Batch processing completed successfully'
+    });
+  } catch (error: any) {
+    // Headers are already sent, so the failure is reported in-stream
+    console.error('Batch processing error:', error);
+    writeLine({
+      type: 'error',
+      error: 'Batch processing failed',
+      message: error.message || 'An error occurred during batch processing'
+    });
+  } finally {
+    res.end();
+  }
+}
+
 export const config = {
   api: {
     responseLimit: false,
@@ -15,6 +15,10 @@ export default async function handler(
   try {
     const categories = await ProductService.getCategories();
 
+    // Let browsers/CDNs reuse the list briefly; Next sets the ETag and
+    // answers If-None-Match revalidations itself
+    res.setHeader("Cache-Control", "public, max-age=60");
+
     res.status(200).json({
       success: true,
       categories: categories,
@@ -1,7 +1,7 @@
 import { NextApiRequest, NextApiResponse } from 'next';
-import { getConnection } from '../../lib/database';
 import { ProductService } from '../../lib/services/productService';
 import { ImageProcessor } from '../../lib/services/imageProcessor';
+import { healthCheck } from '../../lib/database';
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   if (req.method !== 'GET') {
@@ -29,16 +29,17 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
   };
 
   try {
-    // Check database connection
-    try {
-      await getConnection();
-      const productCount = await ProductService.getProductCount();
-      healthStatus.checks.database = true;
-      healthStatus.stats.productCount = productCount;
-    } catch (error) {
-      console.error('Database health check failed:', error);
-      healthStatus.checks.database = false;
+    // Check database connection with a live ping; the product count below
+    // is cached, so it cannot prove the database is reachable right now
+    healthStatus.checks.database = await healthCheck();
+    if (!healthStatus.checks.database) {
       healthStatus.status = 'degraded';
+    } else {
+      try {
+        healthStatus.stats.productCount = await ProductService.getProductCount();
+      } catch (error) {
+        console.error('Product count for health stats failed:', error);
+      }
     }
 
     // Check image processor
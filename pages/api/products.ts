@@ -1,6 +1,18 @@
 import { NextApiRequest, NextApiResponse } from "next";
 import { ProductService } from "../../lib/services/productService";
 
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 100;
+
+function parseQueryInt(
+  value: string | string[] | undefined,
+  fallback: number,
+  max: number = Number.MAX_SAFE_INTEGER
+): number {
+  const parsed = parseInt(typeof value === "string" ? value : "", 10);
+  return parsed >= 0 ? Math.min(parsed, max) : fallback;
+}
+
 export default async function handler(
   req: NextApiRequest,
   res: NextApiResponse
@@ -31,21 +43,50 @@ export default async function handler(
 async function handleGetProducts(req: NextApiRequest, res: NextApiResponse) {
   try {
     const { category, search } = req.query;
+    const limit =
+      parseQueryInt(req.query.limit, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE) ||
+      DEFAULT_PAGE_SIZE;
+
+    let after;
+    if (typeof req.query.cursor === "string" && req.query.cursor) {
+      after = ProductService.decodeCursor(req.query.cursor);
+      if (!after) {
+        return res.status(400).json({
+          error: "Invalid cursor",
+          message: "The pagination cursor is malformed",
+        });
+      }
+    }
 
     let products;
+    let nextCursor: string | null = null;
 
     if (search && typeof search === "string") {
-      products = await ProductService.searchProducts(search);
+      products = await ProductService.searchProductsFulltext(
+        search,
+        typeof category === "string" && category ? category : undefined,
+        limit
+      );
     } else if (category && typeof category === "string") {
-      products = await ProductService.getProductsByCategory(category);
+      products = await ProductService.getProductsByCategory(category, {
+        limit,
+        after,
+      });
     } else {
-      products = await ProductService.getAllProducts();
+      products = await ProductService.getAllProducts({ limit, after });
+    }
+
+    // A full page means there may be more rows after the last one
+    if (!search && products.length === limit) {
+      nextCursor = ProductService.encodeCursor(products[products.length - 1]);
+      res.setHeader("X-Next-Cursor", nextCursor);
     }
 
     res.status(200).json({
       success: true,
       products: products,
       count: products.length,
+      nextCursor: nextCursor,
       message: `Retrieved ${products.length} products`,
     });
   } catch (error: any) {
@@ -1,5 +1,6 @@
 import { NextApiRequest, NextApiResponse } from 'next';
 import { SimilarityService, SimilarityOptions } from '../../lib/services/similarityService';
+import { FEATURE_VECTOR_LENGTH } from '../../lib/services/imageProcessor';
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   if (req.method !== 'POST') {
@@ -9,6 +10,9 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
     });
   }
 
+  // Monotonic clock: cheap to read and unaffected by wall-clock adjustments
+  const startedAt = performance.now();
+
   try {
     const { features, categoryFilter, minSimilarity, maxResults, method } = req.body;
 
@@ -26,6 +30,21 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       });
     }
 
+    // Validate the vector once here so the scoring loop can trust it
+    if (features.length !== FEATURE_VECTOR_LENGTH) {
+      return res.status(400).json({
+        error: 'Invalid features',
+        message: `Features array must contain ${FEATURE_VECTOR_LENGTH} values`
+      });
+    }
+
+    if (!features.every((value: unknown) => typeof value === 'number' && Number.isFinite(value))) {
+      return res.status(400).json({
+        error: 'Invalid features',
+        message: 'Features must be an array of finite numbers'
+      });
+    }
+
     // Prepare search options
     const options: SimilarityOptions = {
       categoryFilter: categoryFilter || undefined,
@@ -40,6 +59,8 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
     // Get statistics
     const stats = SimilarityService.getSimilarityStats(results);
 
+    res.setHeader('Server-Timing', `search;dur=${(performance.now() - startedAt).toFixed(1)}`);
+
     res.status(200).json({
       success: true,
       results: results,
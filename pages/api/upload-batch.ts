@@ -0,0 +1,105 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import {
+  MAX_BATCH_FILES,
+  UploadRecord,
+  UploadService,
+  imageUpload,
+  runMiddleware
+} from '../../lib/services/uploadService';
+
+export default async function handler(req: NextApiRequest, res: NextApiResponse) {
+  if (req.method !== 'POST') {
+    return res.status(405).json({
+      error: 'Method not allowed',
+      message: 'Only POST requests are allowed'
+    });
+  }
+
+  try {
+    await runMiddleware(req, res, imageUpload.array('images', MAX_BATCH_FILES));
+
+    const files: any[] = (req as any).files || [];
+    if (files.length === 0) {
+      return res.status(400).json({
+        error: 'No files uploaded',
+        message: 'Please select one or more image files to upload'
+      });
+    }
+
+    // Process every file concurrently; one bad file must not fail the batch
+    const outcomes = await Promise.allSettled(
+      files.map(file => UploadService.processUploadedFile(file))
+    );
+
+    const processed: UploadRecord[] = [];
+    const failures: Array<{ originalName: string; message: string }> = [];
+
+    outcomes.forEach((outcome, index) => {
+      if (outcome.status === 'fulfilled') {
+        processed.push(outcome.value);
+      } else {
+        console.error(`Batch upload failed for ${files[index].originalname}:`, outcome.reason);
+        failures.push({
+          originalName: files[index].originalname,
+          message: outcome.reason?.message || 'Failed to process image'
+        });
+      }
+    });
+
+    // Record all successful uploads; ids come back in the same order
+    const sessionId = String(req.headers['x-session-id'] || 'anonymous');
+    const uploadIds = await UploadService.recordUploads(processed, sessionId);
+
+    const uploads = processed.map((item, index) => ({
+      uploadId: uploadIds[index],
+      filename: item.imagePath,
+      originalName: item.originalFilename,
+      features: item.features,
+      imageUrl: `/uploads/${item.imagePath}`
+    }));
+
+    res.status(processed.length > 0 ? 200 : 400).json({
+      success: processed.length > 0,
+      uploads: uploads,
+      failures: failures,
+      count: uploads.length,
+      message: `Processed ${uploads.length} of ${files.length} images`
+    });
+
+  } catch (error: any) {
+    console.error('Batch upload error:', error);
+
+    if (error.code === 'LIMIT_FILE_SIZE') {
+      return res.status(400).json({
+        error: 'File too large',
+        message: 'File size must be less than 10MB'
+      });
+    }
+
+    if (error.code === 'LIMIT_FILE_COUNT' || error.code === 'LIMIT_UNEXPECTED_FILE') {
+      return res.status(400).json({
+        error: 'Too many files',
+        message: `A batch may contain at most ${MAX_BATCH_FILES} images`
+      });
+    }
+
+    if (error.message.includes('Invalid file type')) {
+      return res.status(400).json({
+        error: 'Invalid file type',
+        message: error.message
+      });
+    }
+
+    res.status(500).json({
+      error: 'Batch upload failed',
+      message: 'An error occurred while processing your images. Please try again.'
+    });
+  }
+}
+
+// Disable body parser for multer
+export const config = {
+  api: {
+    bodyParser: false,
+  },
+};
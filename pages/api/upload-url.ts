@@ -1,6 +1,6 @@
 import { NextApiRequest, NextApiResponse } from 'next';
 import { ImageProcessor } from '../../lib/services/imageProcessor';
-import { executeQuery } from '../../lib/database';
+import { UploadService } from '../../lib/services/uploadService';
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   if (req.method !== 'POST') {
@@ -34,21 +34,15 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
     const features = await ImageProcessor.extractFeaturesFromURL(imageUrl);
 
     // Save upload record to database
-    const query = `
-      INSERT INTO user_uploads (image_path, original_filename, features, session_id)
-      VALUES (?, ?, ?, ?)
-    `;
-    const sessionId = req.headers['x-session-id'] || 'anonymous';
-    const result: any = await executeQuery(query, [
-      imageUrl,
-      'url-upload',
-      JSON.stringify(features),
+    const sessionId = String(req.headers['x-session-id'] || 'anonymous');
+    const uploadId = await UploadService.recordUpload(
+      { imagePath: imageUrl, originalFilename: 'url-upload', features },
       sessionId
-    ]);
+    );
 
     res.status(200).json({
       success: true,
-      uploadId: result.insertId,
+      uploadId: uploadId,
       features: features,
       imageUrl: imageUrl,
       message: 'Image processed successfully from URL'
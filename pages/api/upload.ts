@@ -1,37 +1,5 @@
 import { NextApiRequest, NextApiResponse } from 'next';
-import multer from 'multer';
-import { ImageProcessor } from '../../lib/services/imageProcessor';
-import { executeQuery } from '../../lib/database';
-import path from 'path';
-import fs from 'fs/promises';
-
-// Configure multer for file uploads
-const upload = multer({
-  storage: multer.memoryStorage(),
-  limits: {
-    fileSize: parseInt(process.env.MAX_FILE_SIZE || '10485760'), // 10MB
-  },
-  fileFilter: (req, file, cb) => {
-    const allowedTypes = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp'];
-    if (allowedTypes.includes(file.mimetype)) {
-      cb(null, true);
-    } else {
-      cb(new Error('Invalid file type. Only JPEG, PNG, and WebP are allowed.'));
-    }
-  },
-});
-
-// Middleware to run multer
-const runMiddleware = (req: NextApiRequest, res: NextApiResponse, fn: any) => {
-  return new Promise((resolve, reject) => {
-    fn(req, res, (result: any) => {
-      if (result instanceof Error) {
-        return reject(result);
-      }
-      return resolve(result);
-    });
-  });
-};
+import { UploadService, imageUpload, runMiddleware } from '../../lib/services/uploadService';
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   if (req.method !== 'POST') {
@@ -43,7 +11,7 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
 
   try {
     // Run multer middleware
-    await runMiddleware(req, res, upload.single('image'));
+    await runMiddleware(req, res, imageUpload.single('image'));
 
     const file = (req as any).file;
     if (!file) {
@@ -53,35 +21,17 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       });
     }
 
-    // Validate file
-    ImageProcessor.validateImageFile(file);
-
-    // Save file to disk
-    const filename = await ImageProcessor.saveUploadedFile(file.buffer, file.originalname);
-    const filePath = path.join(process.env.UPLOAD_DIR || './public/uploads', filename);
-
-    // Extract features from uploaded image
-    const features = await ImageProcessor.extractFeaturesFromFile(filePath);
-
-    // Save upload record to database
-    const query = `
-      INSERT INTO user_uploads (image_path, original_filename, features, session_id)
-      VALUES (?, ?, ?, ?)
-    `;
-    const sessionId = req.headers['x-session-id'] || 'anonymous';
-    const result: any = await executeQuery(query, [
-      filename,
-      file.originalname,
-      JSON.stringify(features),
-      sessionId
-    ]);
+    // Validate, save and extract features, then record the upload
+    const upload = await UploadService.processUploadedFile(file);
+    const sessionId = String(req.headers['x-session-id'] || 'anonymous');
+    const uploadId = await UploadService.recordUpload(upload, sessionId);
 
     res.status(200).json({
       success: true,
-      uploadId: result.insertId,
-      filename: filename,
-      features: features,
-      imageUrl: `/uploads/${filename}`,
+      uploadId: uploadId,
+      filename: upload.imagePath,
+      features: upload.features,
+      imageUrl: `/uploads/${upload.imagePath}`,
       message: 'Image uploaded and processed successfully'
     });
 
@@ -0,0 +1,113 @@
+const cluster = require('cluster');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+// Load environment variables
+require('dotenv').config({ path: '.env.local' });
+
+// Run one Next.js standalone server per worker so a slow request on one
+// event loop cannot stall traffic handled by the others.
+//
+// Build first with `npm run build`; copy `.next/static` (and `public`) into
+// `.next/standalone` as usual for standalone deployments.
+const workerCount = parseInt(process.env.WEB_CONCURRENCY || '') || Math.max(2, os.cpus().length);
+const serverPath = path.join(__dirname, '..', '.next', 'standalone', 'server.js');
+
+// Keep the combined pool size under MySQL's default max_connections (151),
+// leaving headroom for migrations and admin sessions
+const TOTAL_POOL_BUDGET = 120;
+const MIN_POOL_SIZE_PER_WORKER = 4;
+const poolSizePerWorker = String(Math.max(1, Math.floor(TOTAL_POOL_BUDGET / workerCount)));
+
+// A worker that dies this soon after forking counts as a boot failure;
+// restarts back off exponentially and give up after too many in a row
+const BOOT_GRACE_MS = 10000;
+const RESTART_BASE_DELAY_MS = 1000;
+const RESTART_MAX_DELAY_MS = 30000;
+const MAX_CONSECUTIVE_BOOT_FAILURES = 5;
+
+if (cluster.isPrimary) {
+  let shuttingDown = false;
+  let consecutiveBootFailures = 0;
+  const forkedAt = new Map();
+
+  if (!fs.existsSync(serverPath)) {
+    console.error(`❌ ${serverPath} not found; run \`npm run build\` first`);
+    process.exit(1);
+  }
+
+  console.log(`🚀 Starting ${workerCount} workers...`);
+
+  if (!process.env.DATABASE_POOL_SIZE && Number(poolSizePerWorker) < MIN_POOL_SIZE_PER_WORKER) {
+    console.warn(
+      `⚠️  Only ${poolSizePerWorker} database connections per worker across ${workerCount} workers; ` +
+      'lower WEB_CONCURRENCY or raise max_connections and set DATABASE_POOL_SIZE'
+    );
+  }
+
+  const forkWorker = () => {
+    const worker = cluster.fork({
+      DATABASE_POOL_SIZE: process.env.DATABASE_POOL_SIZE || poolSizePerWorker
+    });
+    forkedAt.set(worker.id, Date.now());
+  };
+
+  for (let i = 0; i < workerCount; i++) {
+    forkWorker();
+  }
+
+  cluster.on('exit', (worker, code, signal) => {
+    const uptimeMs = Date.now() - (forkedAt.get(worker.id) || 0);
+    forkedAt.delete(worker.id);
+
+    if (shuttingDown) {
+      return;
+    }
+
+    if (uptimeMs < BOOT_GRACE_MS) {
+      consecutiveBootFailures++;
+    } else {
+      consecutiveBootFailures = 0;
+    }
+
+    if (consecutiveBootFailures >= MAX_CONSECUTIVE_BOOT_FAILURES) {
+      console.error(
+        `❌ Workers failed to start ${consecutiveBootFailures} times in a row, giving up`
+      );
+      shuttingDown = true;
+      for (const remaining of Object.values(cluster.workers)) {
+        remaining.process.kill('SIGTERM');
+      }
+      process.exitCode = 1;
+      return;
+    }
+
+    const delayMs = consecutiveBootFailures === 0
+      ? 0
+      : Math.min(RESTART_BASE_DELAY_MS * 2 ** (consecutiveBootFailures - 1), RESTART_MAX_DELAY_MS);
+
+    console.error(
+      `❌ Worker ${worker.process.pid} exited (${signal || code}), restarting` +
+      (delayMs ? ` in ${delayMs}ms...` : '...')
+    );
+    setTimeout(() => {
+      if (!shuttingDown) {
+        forkWorker();
+      }
+    }, delayMs);
+  });
+
+  const shutdown = (signal) => {
+    shuttingDown = true;
+    console.log(`\nReceived ${signal}, stopping workers...`);
+    for (const worker of Object.values(cluster.workers)) {
+      worker.process.kill(signal);
+    }
+  };
+
+  process.on('SIGINT', () => shutdown('SIGINT'));
+  process.on('SIGTERM', () => shutdown('SIGTERM'));
+} else {
+  require(serverPath);
+}
@@ -36,6 +36,56 @@ function getDatabaseConfig() {
   };
 }
 
+// Add an index to an existing table if it is missing (CREATE TABLE IF NOT EXISTS
+// leaves tables from earlier migrations untouched)
+async function ensureIndex(connection, table, indexName, definition) {
+  const [rows] = await connection.query(
+    `SELECT 1 FROM information_schema.STATISTICS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ? AND INDEX_NAME = ?
+     LIMIT 1`,
+    [table, indexName]
+  );
+
+  if (rows.length > 0) {
+    return;
+  }
+
+  await connection.query(`ALTER TABLE \`${table}\` ADD ${definition}`);
+  console.log(`✅ Added index ${indexName} on ${table}`);
+}
+
+async function dropIndexIfExists(connection, table, indexName) {
+  const [rows] = await connection.query(
+    `SELECT 1 FROM information_schema.STATISTICS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ? AND INDEX_NAME = ?
+     LIMIT 1`,
+    [table, indexName]
+  );
+
+  if (rows.length === 0) {
+    return;
+  }
+
+  await connection.query(`ALTER TABLE \`${table}\` DROP INDEX \`${indexName}\``);
+  console.log(`✅ Dropped index ${indexName} on ${table}`);
+}
+
+async function ensureColumn(connection, table, columnName, definition) {
+  const [rows] = await connection.query(
+    `SELECT 1 FROM information_schema.COLUMNS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ? AND COLUMN_NAME = ?
+     LIMIT 1`,
+    [table, columnName]
+  );
+
+  if (rows.length > 0) {
+    return;
+  }
+
+  await connection.query(`ALTER TABLE \`${table}\` ADD COLUMN ${definition}`);
+  console.log(`✅ Added column ${columnName} on ${table}`);
+}
+
 async function migrate() {
   let connection;
   
@@ -91,15 +141,49 @@ async function migrate() {
         price DECIMAL(10, 2) NOT NULL,
         description TEXT,
         features JSON,
+        search_slug VARCHAR(255) GENERATED ALWAYS AS (LOWER(REPLACE(TRIM(name), ' ', '-'))) STORED,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-        INDEX idx_category (category),
+        INDEX idx_category_name (category, name),
         INDEX idx_name (name),
-        INDEX idx_price (price)
+        INDEX idx_search_slug (search_slug),
+        INDEX idx_price (price),
+        FULLTEXT INDEX ft_products (name, description, category)
       ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
     `);
     console.log('✅ Products table created');
 
+    // Serves category filters sorted by name without a filesort
+    await ensureIndex(
+      connection,
+      'products',
+      'idx_category_name',
+      'INDEX idx_category_name (category, name)'
+    );
+    // idx_category is a prefix of idx_category_name; keeping both only
+    // doubles the write cost on every insert and update
+    await dropIndexIfExists(connection, 'products', 'idx_category');
+    await ensureIndex(
+      connection,
+      'products',
+      'ft_products',
+      'FULLTEXT INDEX ft_products (name, description, category)'
+    );
+
+    // Normalized name for exact-match lookups through an equality index
+    await ensureColumn(
+      connection,
+      'products',
+      'search_slug',
+      "search_slug VARCHAR(255) GENERATED ALWAYS AS (LOWER(REPLACE(TRIM(name), ' ', '-'))) STORED"
+    );
+    await ensureIndex(
+      connection,
+      'products',
+      'idx_search_slug',
+      'INDEX idx_search_slug (search_slug)'
+    );
+
     // User uploads table
     await connection.query(`
       CREATE TABLE IF NOT EXISTS user_uploads (
@@ -46,11 +46,14 @@ async function setupDatabase() {
         price DECIMAL(10, 2) NOT NULL,
         description TEXT,
         features JSON,
+        search_slug VARCHAR(255) GENERATED ALWAYS AS (LOWER(REPLACE(TRIM(name), ' ', '-'))) STORED,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-        INDEX idx_category (category),
+        INDEX idx_category_name (category, name),
         INDEX idx_name (name),
-        INDEX idx_price (price)
+        INDEX idx_search_slug (search_slug),
+        INDEX idx_price (price),
+        FULLTEXT INDEX ft_products (name, description, category)
       ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
     `);
     console.log("✅ Products table created");